@@ -1,86 +1,133 @@
 import ctypes
-import struct
+import mmap
+import os
 import sys
-from collections import namedtuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from logger import logger
+from structs import parse_mam_header, parse_prefetch_headers
 
-# Define MAM file header structure using namedtuple for clean access
-MAMHeader = namedtuple('MAMHeader', ['signature', 'uncompressed_size'])
+# Constants
+COMPRESSION_FORMAT_XPRESS_HUFF = 4
+COMPRESSION_ENGINE_STANDARD = 0
+COMPRESSION_FORMAT = COMPRESSION_FORMAT_XPRESS_HUFF | COMPRESSION_ENGINE_STANDARD
 
-def parse_mam_header(data):
+# Load ntdll.dll and define the function prototypes once at import time; a
+# failure is recorded here and reported when decompression is attempted
+_RtlDecompressBufferEx = None
+_WORKSPACE_SIZE = 0
+_NTDLL_ERROR = "ntdll.dll is only available on Windows"
+
+if sys.platform == 'win32':
+    _ntdll = ctypes.windll.ntdll
+    
+    _RtlGetCompressionWorkSpaceSize = _ntdll.RtlGetCompressionWorkSpaceSize
+    _RtlGetCompressionWorkSpaceSize.argtypes = [
+        ctypes.c_ushort,  # CompressionFormat
+        ctypes.POINTER(ctypes.c_ulong),  # CompressBufferWorkSpaceSize
+        ctypes.POINTER(ctypes.c_ulong)   # CompressFragmentWorkSpaceSize
+    ]
+    _RtlGetCompressionWorkSpaceSize.restype = ctypes.c_long
+    
+    _RtlDecompressBufferEx = _ntdll.RtlDecompressBufferEx
+    _RtlDecompressBufferEx.argtypes = [
+        ctypes.c_ushort,  # CompressionFormat
+        ctypes.c_void_p,  # UncompressedBuffer
+        ctypes.c_ulong,   # UncompressedBufferSize
+        ctypes.c_void_p,  # CompressedBuffer
+        ctypes.c_ulong,   # CompressedBufferSize
+        ctypes.POINTER(ctypes.c_ulong),  # FinalUncompressedSize
+        ctypes.c_void_p   # WorkSpace
+    ]
+    _RtlDecompressBufferEx.restype = ctypes.c_long
+    
+    # Get workspace size once; the workspace itself is allocated per thread
+    _workspace_size = ctypes.c_ulong()
+    _fragment_workspace_size = ctypes.c_ulong()
+    _status = _RtlGetCompressionWorkSpaceSize(COMPRESSION_FORMAT, ctypes.byref(_workspace_size), ctypes.byref(_fragment_workspace_size))
+    if _status != 0:
+        _NTDLL_ERROR = f"RtlGetCompressionWorkSpaceSize failed: {_status}"
+    else:
+        _NTDLL_ERROR = None
+        _WORKSPACE_SIZE = _workspace_size.value
+
+# Per-thread workspace and output buffer, reused across calls
+_buffers = threading.local()
+
+def _get_workspace():
+    """
+    Return this thread's decompression workspace, allocating it on first use.
+    
+    Returns:
+        ctypes.Array or None: The workspace buffer, or None if ntdll needs none
+    """
+    workspace = getattr(_buffers, 'workspace', None)
+    if workspace is None and _WORKSPACE_SIZE > 0:
+        workspace = _buffers.workspace = ctypes.create_string_buffer(_WORKSPACE_SIZE)
+    return workspace
+
+def _get_output_buffer(size):
     """
-    Parse the MAM file header from binary data.
+    Return this thread's output bytearray resized to exactly size bytes.
+    
+    The buffer is only extended when size exceeds its current length. If a
+    memoryview of the previous result is still alive, a new buffer is
+    allocated so the data under that view is never overwritten.
     
     Args:
-        data (bytes): The binary content of the file
+        size (int): The required buffer size
         
     Returns:
-        MAMHeader: Namedtuple containing signature and uncompressed_size
-        
-    Raises:
-        ValueError: If data is too short
+        bytearray: The reused output buffer
     """
-    if len(data) < 8:
-        raise ValueError("Data too short for MAM header")
+    buffer = getattr(_buffers, 'output', None)
+    if buffer is not None:
+        try:
+            # A resize raises BufferError while the buffer is exported, so probe
+            # on every reuse, not only when the size changes
+            buffer.append(0)
+            buffer.pop()
+        except BufferError:
+            buffer = None
     
-    signature, uncompressed_size = struct.unpack('<4sI', data[:8])
-    return MAMHeader(signature, uncompressed_size)
-
-# Define Uncompressed Prefetch Header structure
-UncompressedPrefetchHeader = namedtuple('UncompressedPrefetchHeader', [
-    'format_version', 'signature', 'unknown1', 'file_size', 
-    'executable_filename', 'prefetch_hash', 'unknown_flags'
-])
+    if buffer is None:
+        buffer = _buffers.output = bytearray(size)
+    elif len(buffer) < size:
+        buffer.extend(bytes(size - len(buffer)))
+    else:
+        del buffer[size:]
+    return buffer
 
-def parse_uncompressed_prefetch_header(data):
+def _report(message, quiet):
     """
-    Parse the uncompressed prefetch file header from binary data.
+    Print an error message, or log it instead when running quietly.
     
     Args:
-        data (bytes): The uncompressed prefetch file data
-        
-    Returns:
-        UncompressedPrefetchHeader: Namedtuple containing header fields
-        
-    Raises:
-        ValueError: If data is too short or invalid signature
+        message (str): The message to report
+        quiet (bool): Log the message instead of printing it
     """
-    if len(data) < 84:
-        raise ValueError("Data too short for uncompressed prefetch header")
-    
-    # Unpack format_version (0-3), signature (4-7), unknown1 (8-11), file_size (12-15)
-    format_version, signature, unknown1, file_size = struct.unpack('<I4sII', data[0:16])
-    
-    # Extract executable filename (16-75, 60 bytes, UTF-16 LE, null-terminated, padded with \x00)
-    filename_bytes = data[16:76]
-    executable_filename = filename_bytes.decode('utf-16-le').rstrip('\x00')
-    
-    # Unpack prefetch_hash (76-79), unknown_flags (80-83)
-    prefetch_hash, unknown_flags = struct.unpack('<II', data[76:84])
-    
-    # Verify signature
-    if signature != b'SCCA':
-        raise ValueError(f"Invalid prefetch signature: {signature}")
-    
-    return UncompressedPrefetchHeader(
-        format_version=format_version,
-        signature=signature,
-        unknown1=unknown1,
-        file_size=file_size,
-        executable_filename=executable_filename,
-        prefetch_hash=prefetch_hash,
-        unknown_flags=unknown_flags
-    )
+    if quiet:
+        logger.error(message)
+    else:
+        print(message)
 
-def decompress_xpress_huff(content):
+def decompress_xpress_huff(content, quiet=False):
     """
     Decompress Xpress Huff compressed prefetch file data using ntdll.dll's RtlDecompressBufferEx.
     
     Args:
-        content (bytes): The full binary content of the prefetch file.
+        content (bytes-like): The full binary content of the prefetch file.
+        quiet (bool): Report errors through the logger only instead of printing them (default: False)
     
     Returns:
-        tuple: (MAMHeader, bytes, UncompressedPrefetchHeader) on success, None on failure.
+        tuple: (MAMHeader, bytearray, UncompressedPrefetchHeader, FileInformationHeader)
+        on success, None on failure. The FileInformationHeader is None when the
+        data is not version 31 or is too short to contain it.
+        
+    Note:
+        The returned bytearray is reused by the next call on the same thread
+        unless a memoryview of it is still alive; copy it with bytes() if it
+        must outlive that call.
     """
     try:
         # Parse the MAM file header
@@ -88,85 +135,100 @@ def decompress_xpress_huff(content):
         
         # Verify signature
         if mam_header.signature != b'MAM\x04':
-            print("Invalid MAM file signature")
+            _report("Invalid MAM file signature", quiet)
             return None
         
-        compressed = content[8:]
-        compressed_size = len(compressed)
+        compressed_size = len(content) - 8
         expected_size = mam_header.uncompressed_size
         
-        # Load ntdll.dll
-        ntdll = ctypes.windll.ntdll
-        
-        # Define function pointers
-        RtlGetCompressionWorkSpaceSize = ntdll.RtlGetCompressionWorkSpaceSize
-        RtlGetCompressionWorkSpaceSize.argtypes = [
-            ctypes.c_ushort,  # CompressionFormat
-            ctypes.POINTER(ctypes.c_ulong),  # CompressBufferWorkSpaceSize
-            ctypes.POINTER(ctypes.c_ulong)   # CompressFragmentWorkSpaceSize
-        ]
-        RtlGetCompressionWorkSpaceSize.restype = ctypes.c_long
-        
-        RtlDecompressBufferEx = ntdll.RtlDecompressBufferEx
-        RtlDecompressBufferEx.argtypes = [
-            ctypes.c_ushort,  # CompressionFormat
-            ctypes.c_void_p,  # UncompressedBuffer
-            ctypes.c_ulong,   # UncompressedBufferSize
-            ctypes.c_void_p,  # CompressedBuffer
-            ctypes.c_ulong,   # CompressedBufferSize
-            ctypes.POINTER(ctypes.c_ulong),  # FinalUncompressedSize
-            ctypes.c_void_p   # WorkSpace
-        ]
-        RtlDecompressBufferEx.restype = ctypes.c_long
-        
-        # Constants
-        COMPRESSION_FORMAT_XPRESS_HUFF = 4
-        COMPRESSION_ENGINE_STANDARD = 0
-        format = COMPRESSION_FORMAT_XPRESS_HUFF | COMPRESSION_ENGINE_STANDARD
-        
-        # Get workspace size
-        workspace_size = ctypes.c_ulong()
-        fragment_workspace_size = ctypes.c_ulong()
-        status = RtlGetCompressionWorkSpaceSize(format, ctypes.byref(workspace_size), ctypes.byref(fragment_workspace_size))
-        if status != 0:
-            raise Exception(f"RtlGetCompressionWorkSpaceSize failed: {status}")
+        if _NTDLL_ERROR is not None:
+            raise Exception(_NTDLL_ERROR)
         
-        # Allocate workspace
-        workspace = None
-        if workspace_size.value > 0:
-            workspace = ctypes.create_string_buffer(workspace_size.value)
-        
-        # Allocate buffer for uncompressed data
-        uncompressed = bytearray(expected_size)
+        # Reuse this thread's buffer for uncompressed data
+        uncompressed = _get_output_buffer(expected_size)
         uncompressed_buffer = (ctypes.c_ubyte * expected_size).from_buffer(uncompressed)
         
-        compressed_buffer = (ctypes.c_ubyte * compressed_size)(*compressed)
+        # Copy the compressed payload (everything after the 8-byte MAM header)
+        # into a C buffer with a single memcpy, without slicing it first
+        compressed_buffer = (ctypes.c_char * compressed_size).from_buffer_copy(content, 8)
         
         final_size = ctypes.c_ulong()
         
         # Decompress
-        status = RtlDecompressBufferEx(
-            format,
-            ctypes.cast(uncompressed_buffer, ctypes.c_void_p),
+        status = _RtlDecompressBufferEx(
+            COMPRESSION_FORMAT,
+            uncompressed_buffer,
             expected_size,
-            ctypes.cast(compressed_buffer, ctypes.c_void_p),
+            compressed_buffer,
             compressed_size,
             ctypes.byref(final_size),
-            workspace
+            _get_workspace()
         )
         
+        # Release the ctypes view so the reused buffer can be resized again
+        del uncompressed_buffer
+        
         if status == 0:
-            # Parse the uncompressed prefetch header
+            # Drop any stale bytes left over from a larger previous file
+            del uncompressed[final_size.value:]
+            
+            # Parse the uncompressed prefetch header, and the file information
+            # header too in the same unpack for version 31 files
             try:
-                prefetch_header = parse_uncompressed_prefetch_header(bytes(uncompressed))
-                return mam_header, bytes(uncompressed), prefetch_header
+                prefetch_header, file_info_header = parse_prefetch_headers(uncompressed)
+                return mam_header, uncompressed, prefetch_header, file_info_header
             except ValueError as e:
-                print(f"Failed to parse prefetch header: {e}")
+                _report(f"Failed to parse prefetch header: {e}", quiet)
                 return None
         else:
             return None
     
     except Exception as e:
-        print(f"Decompression error: {e}")
+        if not quiet:
+            print(f"Decompression error: {e}")
         logger.error(f"Decompression error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def _decompress_file(path):
+    """
+    Read and decompress a single prefetch file on a worker thread.
+    
+    Args:
+        path (str): Path to the prefetch file
+        
+    Returns:
+        tuple: (MAMHeader, bytes, UncompressedPrefetchHeader, FileInformationHeader)
+        on success, None on failure.
+    """
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            result = decompress_xpress_huff(content, quiet=True)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to read {path}: {e}")
+        return None
+    
+    if result is None:
+        return None
+    
+    # The thread's output buffer is reused for its next file, so keep a copy
+    mam_header, uncompressed, prefetch_header, file_info_header = result
+    return mam_header, bytes(uncompressed), prefetch_header, file_info_header
+
+def decompress_files(paths, max_workers=None):
+    """
+    Read and decompress many prefetch files concurrently.
+    
+    RtlDecompressBufferEx releases the GIL while it runs, so file reads and
+    decompressions on the worker threads overlap. Failures are reported through
+    the logger only, so messages from different workers do not interleave on stdout.
+    
+    Args:
+        paths (list): Paths to the prefetch files
+        max_workers (int): Number of worker threads (default: os.cpu_count())
+        
+    Returns:
+        list: One result per path, in the same order, each as returned by
+        decompress_xpress_huff (with the data copied to bytes) or None on failure.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        return list(executor.map(_decompress_file, paths))
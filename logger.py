@@ -9,13 +9,20 @@ logging.Formatter.converter = time.gmtime
 # Create logs directory
 os.makedirs('logs', exist_ok=True)
 
-# Custom filter to match exact level
-class LevelFilter(logging.Filter):
-    def __init__(self, level):
-        self.level = level
+# Custom handler that routes each record to the file for its exact level
+class LevelRoutingHandler(logging.Handler):
+    def __init__(self, handlers):
+        super().__init__()
+        self.handlers = handlers
 
-    def filter(self, record):
-        return record.levelno == self.level
+    def emit(self, record):
+        handler = self.handlers.get(record.levelno)
+        if handler is not None:
+            handler.emit(record)
+
+    def flush(self):
+        for handler in self.handlers.values():
+            handler.flush()
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -29,15 +36,15 @@ class UnixTimestampFormatter(logging.Formatter):
 # Formatter
 formatter = UnixTimestampFormatter('%(asctime)s - %(levelname)s - %(message)s')
 
-# File handlers for each level
+# File handlers for each level, dispatched by a single routing handler
 levels = [logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL]
+level_handlers = {}
 for level in levels:
     level_name = logging.getLevelName(level).lower()
     file_handler = logging.FileHandler(f'logs/{level_name}.txt')
-    file_handler.setLevel(level)
     file_handler.setFormatter(formatter)
-    file_handler.addFilter(LevelFilter(level))
-    logger.addHandler(file_handler)
+    level_handlers[level] = file_handler
+logger.addHandler(LevelRoutingHandler(level_handlers))
 
 # Function to flush all handlers on exit
 def flush_logs():
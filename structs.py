@@ -1,6 +1,24 @@
+import codecs
 import struct
 from collections import namedtuple
 
+# UTF-16 LE decoder looked up once instead of on every decode() call
+_utf16le_decode = codecs.getdecoder('utf-16-le')
+
+# Pre-compiled struct layouts, built once at import so the format strings
+# are not reparsed on every call
+_MAM_HEADER = struct.Struct('<4sI')                    # 8 bytes
+_PREFETCH_HEADER_START = struct.Struct('<I4sII')       # bytes 0-15
+_PREFETCH_HEADER_END = struct.Struct('<II')            # bytes 76-83
+_FILE_INFORMATION_HEADER = struct.Struct('<9IQ8QQ5I76s')  # 212 bytes
+_VOLUME_INFORMATION_ENTRY = struct.Struct('<IIQ6I24sI24sI')  # 96 bytes
+
+# Version 31 prologue: the uncompressed header (filename skipped, decoded
+# separately) followed directly by the file information header, 84 + 212 bytes
+_V31_PROLOGUE = struct.Struct('<' + _PREFETCH_HEADER_START.format[1:] + '60x'
+                              + _PREFETCH_HEADER_END.format[1:]
+                              + _FILE_INFORMATION_HEADER.format[1:])
+
 # Define MAM file header structure using namedtuple for clean access
 MAMHeader = namedtuple('MAMHeader', ['signature', 'uncompressed_size'])
 
@@ -20,9 +38,27 @@ def parse_mam_header(data):
     if len(data) < 8:
         raise ValueError("Data too short for MAM header")
     
-    signature, uncompressed_size = struct.unpack('<4sI', data[:8])
+    signature, uncompressed_size = _MAM_HEADER.unpack_from(data, 0)
     return MAMHeader(signature, uncompressed_size)
 
+def _decode_executable_filename(data):
+    """
+    Decode the executable filename (bytes 16-75, UTF-16 LE, null-terminated, padded with \\x00).
+    
+    Args:
+        data (bytes): The uncompressed prefetch file data
+        
+    Returns:
+        str: The executable filename
+    """
+    # Find the terminator first so only the filename itself is decoded
+    end = data.find(b'\x00\x00', 16, 76)
+    while end != -1 and (end - 16) & 1:
+        end = data.find(b'\x00\x00', end + 1, 76)
+    if end == -1:
+        end = 76
+    return _utf16le_decode(data[16:end])[0]
+
 # Define Uncompressed Prefetch Header structure
 UncompressedPrefetchHeader = namedtuple('UncompressedPrefetchHeader', [
     'format_version', 'signature', 'unknown1', 'file_size', 
@@ -46,14 +82,13 @@ def parse_uncompressed_prefetch_header(data):
         raise ValueError("Data too short for uncompressed prefetch header")
     
     # Unpack format_version (0-3), signature (4-7), unknown1 (8-11), file_size (12-15)
-    format_version, signature, unknown1, file_size = struct.unpack('<I4sII', data[0:16])
+    format_version, signature, unknown1, file_size = _PREFETCH_HEADER_START.unpack_from(data, 0)
     
     # Extract executable filename (16-75, 60 bytes, UTF-16 LE, null-terminated, padded with \x00)
-    filename_bytes = data[16:76]
-    executable_filename = filename_bytes.decode('utf-16-le').rstrip('\x00')
+    executable_filename = _decode_executable_filename(data)
     
     # Unpack prefetch_hash (76-79), unknown_flags (80-83)
-    prefetch_hash, unknown_flags = struct.unpack('<II', data[76:84])
+    prefetch_hash, unknown_flags = _PREFETCH_HEADER_END.unpack_from(data, 76)
     
     # Verify signature
     if signature != b'SCCA':
@@ -70,7 +105,7 @@ def parse_uncompressed_prefetch_header(data):
     )
 
 # Define File Information Header structure (version 30 - variant 2)
-FileInformationHeader = namedtuple('FileInformationHeader', [
+class FileInformationHeader(namedtuple('FileInformationHeader', [
     'file_metrics_array_offset', 'num_file_metrics_entries',
     'trace_chains_array_offset', 'num_trace_chains_entries',
     'filename_strings_offset', 'filename_strings_size',
@@ -78,7 +113,35 @@ FileInformationHeader = namedtuple('FileInformationHeader', [
     'unknown1', 'last_run_times', 'unknown2',
     'run_count', 'unknown3', 'unknown4',
     'hash_string_offset', 'hash_string_size', 'unknown5'
-])
+])):
+    __slots__ = ()
+    
+    def __str__(self):
+        """Format the header fields as indented report lines, built only when printed."""
+        lines = [
+            f"    File Metrics Array Offset: {self.file_metrics_array_offset}",
+            f"    Number of File Metrics Entries: {self.num_file_metrics_entries}",
+            f"    Trace Chains Array Offset: {self.trace_chains_array_offset}",
+            f"    Number of Trace Chains Entries: {self.num_trace_chains_entries}",
+            f"    Filename Strings Offset: {self.filename_strings_offset}",
+            f"    Filename Strings Size: {self.filename_strings_size}",
+            f"    Volumes Information Offset: {self.volumes_info_offset}",
+            f"    Number of Volumes: {self.num_volumes}",
+            f"    Volumes Information Size: {self.volumes_info_size}",
+            f"    Unknown1: 0x{self.unknown1:016x}",
+            "    Last Run Times:",
+        ]
+        lines.extend(f"        [{i}]: 0x{filetime:016x}" for i, filetime in enumerate(self.last_run_times))
+        lines.extend([
+            f"    Unknown2: 0x{self.unknown2:016x}",
+            f"    Run Count: {self.run_count}",
+            f"    Unknown3: {self.unknown3}",
+            f"    Unknown4: {self.unknown4}",
+            f"    Hash String Offset: {self.hash_string_offset}",
+            f"    Hash String Size: {self.hash_string_size}",
+            f"    Unknown5: {self.unknown5.hex()}",
+        ])
+        return '\n'.join(lines)
 
 def parse_file_information_header(data, offset=84):
     """
@@ -97,66 +160,38 @@ def parse_file_information_header(data, offset=84):
     if len(data) < offset + 212:
         raise ValueError("Data too short for file information header")
     
-    # Extract data starting from the offset
-    header_data = data[offset:offset + 212]
-    
-    # Unpack the fields according to the specification
-    file_metrics_array_offset = struct.unpack('<I', header_data[0:4])[0]
-    num_file_metrics_entries = struct.unpack('<I', header_data[4:8])[0]
-    trace_chains_array_offset = struct.unpack('<I', header_data[8:12])[0]
-    num_trace_chains_entries = struct.unpack('<I', header_data[12:16])[0]
-    filename_strings_offset = struct.unpack('<I', header_data[16:20])[0]
-    filename_strings_size = struct.unpack('<I', header_data[20:24])[0]
-    volumes_info_offset = struct.unpack('<I', header_data[24:28])[0]
-    num_volumes = struct.unpack('<I', header_data[28:32])[0]
-    volumes_info_size = struct.unpack('<I', header_data[32:36])[0]
-    unknown1 = struct.unpack('<Q', header_data[36:44])[0]
-    
-    # Last run times - 8 FILETIMEs (each 8 bytes)
-    last_run_times = []
-    for i in range(8):
-        start = 44 + (i * 8)
-        end = start + 8
-        filetime = struct.unpack('<Q', header_data[start:end])[0]
-        last_run_times.append(filetime)
-    
-    unknown2 = struct.unpack('<Q', header_data[108:116])[0]
-    run_count = struct.unpack('<I', header_data[116:120])[0]
-    unknown3 = struct.unpack('<I', header_data[120:124])[0]
-    unknown4 = struct.unpack('<I', header_data[124:128])[0]
-    hash_string_offset = struct.unpack('<I', header_data[128:132])[0]
-    hash_string_size = struct.unpack('<I', header_data[132:136])[0]
-    unknown5 = header_data[136:212]  # 76 bytes of unknown data
-    
-    return FileInformationHeader(
-        file_metrics_array_offset=file_metrics_array_offset,
-        num_file_metrics_entries=num_file_metrics_entries,
-        trace_chains_array_offset=trace_chains_array_offset,
-        num_trace_chains_entries=num_trace_chains_entries,
-        filename_strings_offset=filename_strings_offset,
-        filename_strings_size=filename_strings_size,
-        volumes_info_offset=volumes_info_offset,
-        num_volumes=num_volumes,
-        volumes_info_size=volumes_info_size,
-        unknown1=unknown1,
-        last_run_times=last_run_times,
-        unknown2=unknown2,
-        run_count=run_count,
-        unknown3=unknown3,
-        unknown4=unknown4,
-        hash_string_offset=hash_string_offset,
-        hash_string_size=hash_string_size,
-        unknown5=unknown5
-    )
+    # Unpack the whole header in one call; fields 10-17 are the
+    # 8 last run time FILETIMEs, which are grouped into a single tuple
+    fields = _FILE_INFORMATION_HEADER.unpack_from(data, offset)
+    return FileInformationHeader(*fields[:10], fields[10:18], *fields[18:])
 
 # Define Volume Information Entry structure (version 30)
-VolumeInformationEntry = namedtuple('VolumeInformationEntry', [
+class VolumeInformationEntry(namedtuple('VolumeInformationEntry', [
     'volume_device_path_offset', 'volume_device_path_num_chars',
     'volume_creation_time', 'volume_serial_number',
     'file_references_offset', 'file_references_data_size',
     'directory_strings_offset', 'num_directory_strings',
     'unknown1', 'unknown2', 'unknown3', 'unknown4', 'unknown5'
-])
+])):
+    __slots__ = ()
+    
+    def __str__(self):
+        """Format the entry fields as indented report lines, built only when printed."""
+        return '\n'.join([
+            f"    Volume Device Path Offset: {self.volume_device_path_offset}",
+            f"    Volume Device Path Num Chars: {self.volume_device_path_num_chars}",
+            f"    Volume Creation Time: 0x{self.volume_creation_time:016x}",
+            f"    Volume Serial Number: 0x{self.volume_serial_number:08x}",
+            f"    File References Offset: {self.file_references_offset}",
+            f"    File References Data Size: {self.file_references_data_size}",
+            f"    Directory Strings Offset: {self.directory_strings_offset}",
+            f"    Number of Directory Strings: {self.num_directory_strings}",
+            f"    Unknown1: {self.unknown1}",
+            f"    Unknown2: {self.unknown2.hex()}",
+            f"    Unknown3: {self.unknown3}",
+            f"    Unknown4: {self.unknown4.hex()}",
+            f"    Unknown5: {self.unknown5}",
+        ])
 
 def parse_volume_information_entry(data, offset=0):
     """
@@ -175,36 +210,56 @@ def parse_volume_information_entry(data, offset=0):
     if len(data) < offset + 96:
         raise ValueError("Data too short for volume information entry")
     
-    # Extract data starting from the offset
-    entry_data = data[offset:offset + 96]
-    
-    # Unpack the fields according to the specification
-    volume_device_path_offset = struct.unpack('<I', entry_data[0:4])[0]
-    volume_device_path_num_chars = struct.unpack('<I', entry_data[4:8])[0]
-    volume_creation_time = struct.unpack('<Q', entry_data[8:16])[0]
-    volume_serial_number = struct.unpack('<I', entry_data[16:20])[0]
-    file_references_offset = struct.unpack('<I', entry_data[20:24])[0]
-    file_references_data_size = struct.unpack('<I', entry_data[24:28])[0]
-    directory_strings_offset = struct.unpack('<I', entry_data[28:32])[0]
-    num_directory_strings = struct.unpack('<I', entry_data[32:36])[0]
-    unknown1 = struct.unpack('<I', entry_data[36:40])[0]
-    unknown2 = entry_data[40:64]  # 24 bytes of unknown data
-    unknown3 = struct.unpack('<I', entry_data[64:68])[0]
-    unknown4 = entry_data[68:92]  # 24 bytes of unknown data
-    unknown5 = struct.unpack('<I', entry_data[92:96])[0]
-    
-    return VolumeInformationEntry(
-        volume_device_path_offset=volume_device_path_offset,
-        volume_device_path_num_chars=volume_device_path_num_chars,
-        volume_creation_time=volume_creation_time,
-        volume_serial_number=volume_serial_number,
-        file_references_offset=file_references_offset,
-        file_references_data_size=file_references_data_size,
-        directory_strings_offset=directory_strings_offset,
-        num_directory_strings=num_directory_strings,
-        unknown1=unknown1,
-        unknown2=unknown2,
-        unknown3=unknown3,
-        unknown4=unknown4,
-        unknown5=unknown5
-    )
\ No newline at end of file
+    # Unpack the whole entry in one call; unknown2 and unknown4 are 24-byte blobs
+    return VolumeInformationEntry._make(_VOLUME_INFORMATION_ENTRY.unpack_from(data, offset))
+
+def parse_v31_prologue(data):
+    """
+    Parse the uncompressed prefetch header and the file information header of a
+    version 31 prefetch file with a single unpack.
+    
+    Args:
+        data (bytes): The uncompressed prefetch file data
+        
+    Returns:
+        tuple: (UncompressedPrefetchHeader, FileInformationHeader)
+        
+    Raises:
+        ValueError: If data is too short, invalid signature or not version 31
+    """
+    if len(data) < _V31_PROLOGUE.size:
+        raise ValueError("Data too short for version 31 prefetch prologue")
+    
+    fields = _V31_PROLOGUE.unpack_from(data, 0)
+    
+    # Verify signature and version
+    if fields[1] != b'SCCA':
+        raise ValueError(f"Invalid prefetch signature: {fields[1]}")
+    if fields[0] != 31:
+        raise ValueError(f"Unsupported prefetch format version: {fields[0]}")
+    
+    prefetch_header = UncompressedPrefetchHeader(*fields[:4], _decode_executable_filename(data), *fields[4:6])
+    
+    # File information header fields start at index 6; 16-23 are the last run times
+    file_info_header = FileInformationHeader(*fields[6:16], fields[16:24], *fields[24:])
+    return prefetch_header, file_info_header
+
+def parse_prefetch_headers(data):
+    """
+    Parse the uncompressed prefetch header, together with the file information
+    header when the data is a complete version 31 prologue.
+    
+    Args:
+        data (bytes): The uncompressed prefetch file data
+        
+    Returns:
+        tuple: (UncompressedPrefetchHeader, FileInformationHeader or None); the
+        file information header is None when the data is not version 31 or is
+        too short to contain it
+        
+    Raises:
+        ValueError: If data is too short or invalid signature
+    """
+    if len(data) >= _V31_PROLOGUE.size and _PREFETCH_HEADER_START.unpack_from(data, 0)[0] == 31:
+        return parse_v31_prologue(data)
+    return parse_uncompressed_prefetch_header(data), None